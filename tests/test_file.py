@@ -0,0 +1,26 @@
+import unittest
+
+import uwebserver
+
+STATIC_FOLDER = "examples/static"
+
+
+class TestFile(unittest.TestCase):
+    def test_from_path(self):
+        file = uwebserver.File.from_path(STATIC_FOLDER + "/index.html")
+        with open(STATIC_FOLDER + "/index.html", "rb") as f:
+            size = len(f.read())
+
+        self.assertIsNotNone(file)
+        self.assertEqual(file.size, size)  # type: ignore
+        self.assertEqual(file.encoding, None)  # type: ignore
+
+    def test_from_path_missing(self):
+        self.assertIsNone(uwebserver.File.from_path(STATIC_FOLDER + "/missing.html"))
+
+    def test_from_path_directory(self):
+        self.assertIsNone(uwebserver.File.from_path(STATIC_FOLDER))
+
+
+if __name__ == "__main__":
+    unittest.main()
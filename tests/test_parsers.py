@@ -7,22 +7,22 @@ class TestParsers(unittest.TestCase):
     def test_parse_request(self):
         cases = (
             (
-                "POST / HTTP/1.1",
+                b"POST / HTTP/1.1",
                 ("POST", "/"),
                 "Request POST",
             ),
             (
-                "GET /background.png HTTP/1.0",
+                b"GET /background.png HTTP/1.0",
                 ("GET", "/background.png"),
                 "Request GET",
             ),
             (
-                "HEAD /test.html?query=alibaba HTTP/1.1",
+                b"HEAD /test.html?query=alibaba HTTP/1.1",
                 ("HEAD", "/test.html?query=alibaba"),
                 "Request HEAD",
             ),
             (
-                "OPTIONS /anypage.html HTTP/1.0",
+                b"OPTIONS /anypage.html HTTP/1.0",
                 ("OPTIONS", "/anypage.html"),
                 "Request OPTIONS",
             ),
@@ -34,17 +34,29 @@ class TestParsers(unittest.TestCase):
 
     def test_invalid_request(self):
         with self.assertRaises(ValueError):
-            uwebserver._parse_request("INVALID REQUEST")
+            uwebserver._parse_request(b"INVALID REQUEST")
 
-    def test_parse_headers(self):
+    def test_route_key(self):
+        cases = (
+            (b"GET / HTTP/1.1", b"GET /", "Key root"),
+            (b"POST /path/to/page HTTP/1.0", b"POST /path/to/page", "Key path"),
+            (b"GET /test?query=alibaba HTTP/1.1", b"GET /test", "Key without query string"),
+        )
+
+        for case, result, msg in cases:
+            with self.subTest(msg):
+                self.assertEqual(uwebserver._route_key(case), result)
+
+    def test_parse_header(self):
         case = (
-            "User-Agent: Mozilla/4.0 (compatible; MSIE5.01; Windows NT)\r\n"
-            "Host: www.github.com\r\n"
-            "Content-Type: application/x-www-form-urlencoded\r\n"
-            "Content-Length: length\r\n"
-            "Accept-Language: en-us\r\n"
-            "Accept-Encoding: gzip, deflate\r\n"
-            "Connection: Keep-Alive"
+            b"User-Agent: Mozilla/4.0 (compatible; MSIE5.01; Windows NT)",
+            b"Host: www.github.com",
+            b"Content-Type: application/x-www-form-urlencoded",
+            b"Content-Length: length",
+            b"Accept-Language: en-us",
+            b"Accept-Encoding: gzip, deflate",
+            b"Connection: Keep-Alive",
+            b"x-custom-header: value",
         )
         result = {
             "user-agent": "Mozilla/4.0 (compatible; MSIE5.01; Windows NT)",
@@ -54,11 +66,16 @@ class TestParsers(unittest.TestCase):
             "accept-language": "en-us",
             "accept-encoding": "gzip, deflate",
             "connection": "Keep-Alive",
+            "x-custom-header": "value",
         }
 
-        self.assertEqual(uwebserver._parse_headers(case), result)
+        self.assertEqual(dict(map(uwebserver._parse_header, case)), result)
+
+    def test_invalid_header(self):
+        with self.assertRaises(ValueError):
+            uwebserver._parse_header(b"INVALID HEADER")
 
-    def test_parse_path(self):
+    def test_split_path(self):
         cases = (
             (
                 "/test",
@@ -72,24 +89,47 @@ class TestParsers(unittest.TestCase):
             ),
             (
                 "/test?query=alibaba",
-                ("/test", dict(query="alibaba")),
-                "Path with query value",
+                ("/test", "query=alibaba"),
+                "Path with query string",
+            ),
+            (
+                "/test?",
+                ("/test", ""),
+                "Path with empty query string",
+            ),
+        )
+
+        for case, result, msg in cases:
+            with self.subTest(msg):
+                self.assertEqual(uwebserver._split_path(case), result)
+
+    def test_parse_qs(self):
+        cases = (
+            (
+                "query=alibaba",
+                dict(query="alibaba"),
+                "Query value",
+            ),
+            (
+                "name=ferret&color=purple&style=class",
+                dict(name="ferret", color="purple", style="class"),
+                "Multiple query values",
             ),
             (
-                "/path/to/page?name=ferret&color=purple&style=class",
-                ("/path/to/page", dict(name="ferret", color="purple", style="class")),
-                "Path with multiple query values",
+                "empty=&test=1&another=",
+                dict(empty="", test="1", another=""),
+                "Query value that is empty",
             ),
             (
-                "/test?empty=&test=1&another=",
-                ("/test", dict(empty="", test="1", another="")),
-                "Path with query value that is empty",
+                "flag&test=1",
+                dict(flag="", test="1"),
+                "Query key without value",
             ),
         )
 
         for case, result, msg in cases:
             with self.subTest(msg):
-                self.assertEqual(uwebserver._parse_path(case), result)
+                self.assertEqual(uwebserver._parse_qs(case), result)
 
 
 if __name__ == "__main__":
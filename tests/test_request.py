@@ -76,6 +76,27 @@ class TestRequest(unittest.TestCase):
                 },
                 "From stream GET request with query string",
             ),
+            (
+                (
+                    b"GET /style.css HTTP/1.1\r\n"
+                    b"host: developer.mozilla.org\r\n"
+                    b"accept-encoding: gzip\r\n"
+                    b"X-Custom-Header: Value\r\n"
+                    b"\r\n"
+                ),
+                {
+                    "method": "GET",
+                    "path": "/style.css",
+                    "headers": {
+                        "host": "developer.mozilla.org",
+                        "accept-encoding": "gzip",
+                        "x-custom-header": "Value",
+                    },
+                    "query": None,
+                    "body": None,
+                },
+                "From stream GET request with mixed case headers",
+            ),
         )
 
         for buffer, expected_dict, msg in cases:
@@ -84,6 +105,29 @@ class TestRequest(unittest.TestCase):
                 for attr, value in expected_dict.items():
                     self.assertEqual(getattr(req, attr), value)
 
+    def test_lazy_query(self):
+        buffer = b"GET /test?name=ferret&color=purple HTTP/1.1\r\nHost: localhost\r\n\r\n"
+        req = asyncio.run(uwebserver.Request.from_stream(MockStream(buffer)))
+
+        self.assertEqual(req._q, "name=ferret&color=purple")
+        query = req.query
+        self.assertEqual(query, {"name": "ferret", "color": "purple"})
+        self.assertIs(req.query, query)
+
+        req.query = {"other": "value"}
+        self.assertEqual(req.query, {"other": "value"})
+
+    def test_incomplete_stream(self):
+        cases = (
+            (b"GET / HTTP/1.1", "Stream ends in request line"),
+            (b"GET / HTTP/1.1\r\nHost: a:b:c", "Stream ends in header"),
+            (b"GET / HTTP/1.1\r\nHost: developer.mozilla.org\r\n", "Stream ends before blank line"),
+        )
+
+        for buffer, msg in cases:
+            with self.subTest(msg), self.assertRaises(ValueError):
+                asyncio.run(uwebserver.Request.from_stream(MockStream(buffer)))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -54,6 +54,19 @@ class TestResponse(unittest.TestCase):
                 self.response.set_content_type(ct)
                 self.assertEqual(self.response.headers.get("content-type"), ct)
 
+    def test_reset(self):
+        self.response.set_status("303 See Other")
+        self.response.set_header("location", "/")
+        self.response.set_content_type("text/html")
+        self.response.set_body("test")
+        self.response.reset()
+
+        self.assertEqual(self.response.body, None)
+        self.assertEqual(self.response.status, b"200 OK")
+        self.assertEqual(
+            self.response.headers, {"connection": "close", "content-type": "text/plain"}
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
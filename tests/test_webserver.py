@@ -1,11 +1,15 @@
 import asyncio
+import os
 import unittest
 from collections import namedtuple
 
+from test_request import MockStream
+
 import uwebserver
 
 HOST, PORT = "127.0.0.1", 8000
 TEST_TIMEOUT = 10
+STATIC_CACHE_FOLDER = "tests/static_cache"
 
 
 class Response(namedtuple("Response", "status headers body")):
@@ -13,7 +17,7 @@ class Response(namedtuple("Response", "status headers body")):
     def from_bytes(cls, raw: bytes):
         status, _, raw = raw.partition(b"\r\n")
         headers_raw, _, body = raw.partition(b"\r\n\r\n")
-        return cls(status, uwebserver._parse_headers(headers_raw.decode()), body)
+        return cls(status, dict(map(uwebserver._parse_header, headers_raw.split(b"\r\n"))), body)
 
 
 class Connection:
@@ -132,6 +136,24 @@ class TestDefaultWebServer(unittest.TestCase):
         self.assertEqual(response.headers.get("content-encoding"), "gzip")
         self.assertEqual(response.body, expected)
 
+    def test_scanned_static_file_handling(self):
+        self.app.scan_static()
+        response = self.loop.run_until_complete(timeout(fetch("GET", "/page1.html", None)))
+        with open("./" + self.static_folder + "/page1.html", "rb") as f:
+            expected = f.read()
+
+        self.assertEqual(response.headers.get("content-type"), "text/html")
+        self.assertEqual(response.body, expected)
+
+    def test_scanned_compressed_static_file_handling(self):
+        self.app.scan_static()
+        response = self.loop.run_until_complete(timeout(fetch("GET", "/favicon.ico", None)))
+        with open("./" + self.static_folder + "/favicon.ico.gz", "rb") as f:
+            expected = f.read()
+
+        self.assertEqual(response.headers.get("content-encoding"), "gzip")
+        self.assertEqual(response.body, expected)
+
     def test_invalid_request(self):
         async def send_invalid_request():
             async with Connection(HOST, PORT) as (reader, writer):
@@ -287,5 +309,192 @@ class TestWebServer(unittest.TestCase):
         self.assertEqual(response, expected)
 
 
+def _write_file(path: str, data: bytes):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+class TestStaticCache(unittest.TestCase):
+    def setUp(self) -> None:
+        try:
+            os.mkdir(STATIC_CACHE_FOLDER)
+        except OSError:
+            pass
+        _write_file(STATIC_CACHE_FOLDER + "/a.txt", b"first")
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self) -> None:
+        for name in os.listdir(STATIC_CACHE_FOLDER):
+            os.remove(STATIC_CACHE_FOLDER + "/" + name)
+        os.rmdir(STATIC_CACHE_FOLDER)
+        self.loop.close()
+
+    @staticmethod
+    def lookup(app: uwebserver.WebServer, path: str):
+        return app._get_static(uwebserver.Request("GET", path, {}, None, None))
+
+    def test_cache_disabled_by_default(self):
+        app = uwebserver.WebServer(static_folder=STATIC_CACHE_FOLDER)
+
+        self.assertIsNotNone(self.lookup(app, "/a.txt"))
+        os.remove(STATIC_CACHE_FOLDER + "/a.txt")
+        self.assertIsNone(self.lookup(app, "/a.txt"))
+
+    def test_cache_hit(self):
+        app = uwebserver.WebServer(static_folder=STATIC_CACHE_FOLDER, static_cache_size=4)
+
+        file = self.lookup(app, "/a.txt")
+        os.remove(STATIC_CACHE_FOLDER + "/a.txt")
+
+        self.assertIsNotNone(file)
+        self.assertIs(self.lookup(app, "/a.txt"), file)
+
+    def test_cache_miss(self):
+        app = uwebserver.WebServer(static_folder=STATIC_CACHE_FOLDER, static_cache_size=4)
+
+        self.assertIsNone(self.lookup(app, "/b.txt"))
+        _write_file(STATIC_CACHE_FOLDER + "/b.txt", b"second")
+        self.assertIsNone(self.lookup(app, "/b.txt"))
+
+    def test_cache_eviction(self):
+        app = uwebserver.WebServer(static_folder=STATIC_CACHE_FOLDER, static_cache_size=1)
+
+        self.assertIsNotNone(self.lookup(app, "/a.txt"))
+        self.assertIsNone(self.lookup(app, "/b.txt"))  # Full, clears the cache
+        os.remove(STATIC_CACHE_FOLDER + "/a.txt")
+        self.assertIsNone(self.lookup(app, "/a.txt"))
+
+    def test_cached_file_grown(self):
+        app = uwebserver.WebServer(
+            port=PORT, static_folder=STATIC_CACHE_FOLDER, static_cache_size=4
+        )
+        self.loop.run_until_complete(timeout(app.start()))
+        self.loop.run_until_complete(timeout(app.wait_ready()))
+
+        try:
+            first = self.loop.run_until_complete(timeout(fetch("GET", "/a.txt", None)))
+            _write_file(STATIC_CACHE_FOLDER + "/a.txt", b"first and then some more")
+            second = self.loop.run_until_complete(timeout(fetch("GET", "/a.txt", None)))
+        finally:
+            app.close()
+            self.loop.run_until_complete(timeout(app.wait_closed()))
+
+        self.assertEqual(first.body, b"first")
+        self.assertEqual(second.headers.get("content-length"), "5")
+        self.assertEqual(second.body, b"first")
+
+    def handle(self, app: uwebserver.WebServer, path: str):
+        writer = _MockWriter()
+        req = uwebserver.Request("GET", path, {}, None, None)
+        self.loop.run_until_complete(app._handle_request(writer, req, uwebserver.Response()))
+        return Response.from_bytes(writer.buffer)
+
+    def test_scanned_file_deleted(self):
+        app = uwebserver.WebServer(static_folder=STATIC_CACHE_FOLDER)
+        app.scan_static()
+        os.remove(STATIC_CACHE_FOLDER + "/a.txt")
+
+        self.assertEqual(self.handle(app, "/a.txt").status, b"HTTP/1.1 404 Not Found")
+
+    def test_cached_file_deleted(self):
+        app = uwebserver.WebServer(static_folder=STATIC_CACHE_FOLDER, static_cache_size=4)
+
+        self.assertEqual(self.handle(app, "/a.txt").body, b"first")
+        os.remove(STATIC_CACHE_FOLDER + "/a.txt")
+        self.assertEqual(self.handle(app, "/a.txt").status, b"HTTP/1.1 404 Not Found")
+
+
+class _CountingGC:
+    def __init__(self) -> None:
+        self.collections = 0
+
+    def collect(self):
+        self.collections += 1
+
+
+class _MockWriter:
+    def __init__(self) -> None:
+        self.buffer = b""
+
+    def write(self, data):
+        self.buffer += data
+
+    async def drain(self):
+        pass
+
+
+class TestRouting(unittest.TestCase):
+    def test_constructed_request(self):
+        app = uwebserver.WebServer(static_folder=None)
+        app.add_route("/simple", lambda req, resp: "Hello")
+        req = uwebserver.Request("GET", "/simple", {}, None, None)
+        writer = _MockWriter()
+
+        asyncio.run(app._handle_request(writer, req, uwebserver.Response()))
+
+        self.assertEqual(Response.from_bytes(writer.buffer).body, b"Hello")
+
+    def test_missing_handler_file(self):
+        app = uwebserver.WebServer(static_folder=None)
+        app.add_route("/file", lambda req, resp: uwebserver.File("missing.txt", 5))
+        req = uwebserver.Request("GET", "/file", {}, None, None)
+        writer = _MockWriter()
+
+        asyncio.run(app._handle_request(writer, req, uwebserver.Response()))
+
+        self.assertEqual(
+            Response.from_bytes(writer.buffer).status, b"HTTP/1.1 500 Internal Server Error"
+        )
+
+
+class _ResetWriter:
+    def write(self, data):
+        pass
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+    async def wait_closed(self):
+        raise OSError()
+
+
+class TestGarbageCollection(unittest.TestCase):
+    def setUp(self) -> None:
+        self.gc, self.mem_free = uwebserver.gc, uwebserver._mem_free
+        uwebserver.gc = self.counter = _CountingGC()  # type: ignore
+        uwebserver._mem_free = lambda: uwebserver._GC_LOW_MEMORY
+
+    def tearDown(self) -> None:
+        uwebserver.gc, uwebserver._mem_free = self.gc, self.mem_free
+
+    def test_gc_interval(self):
+        app = uwebserver.WebServer(gc_interval=3)
+        for _ in range(7):
+            app._gc()
+
+        self.assertEqual(self.counter.collections, 2)
+
+    def test_gc_low_memory(self):
+        app = uwebserver.WebServer(gc_interval=3)
+        uwebserver._mem_free = lambda: 0
+        for _ in range(2):
+            app._gc()
+
+        self.assertEqual(self.counter.collections, 2)
+
+    def test_gc_after_failed_close(self):
+        app = uwebserver.WebServer(gc_interval=1, static_folder=None)
+        reader = MockStream(b"GET / HTTP/1.1\r\nHost: localhost\r\n\r\n")
+
+        with self.assertRaises(OSError):
+            asyncio.run(app._handle(reader, _ResetWriter()))
+
+        self.assertEqual(self.counter.collections, 1)
+        self.assertEqual(len(app._rp), 1)
+
+
 if __name__ == "__main__":
     unittest.main()
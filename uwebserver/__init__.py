@@ -1,6 +1,7 @@
 import asyncio
 import gc
 import os
+import socket
 
 try:
     import micropython
@@ -17,8 +18,8 @@ except:
     pass
 
 try:
-    from collections.abc import Awaitable, Callable, Iterable
-    from typing import TYPE_CHECKING, Generic, Literal, TypeAlias, TypeGuard, TypeVar
+    from collections.abc import Awaitable, Callable, Iterable, Iterator
+    from typing import TYPE_CHECKING, AnyStr, Generic, Literal, TypeAlias, TypeGuard, TypeVar
 except ImportError:
     TYPE_CHECKING = False
     Generic = type("Generic", (), {"__getitem__": lambda s, n: object})()
@@ -36,29 +37,62 @@ if TYPE_CHECKING:
 
 _TStatic = TypeVar("_TStatic", bound="str | None")
 
-_READ_SIZE = micropython.const(128)
-_WRITE_BUFFER_SIZE = micropython.const(128)
-_FILE_INDICATOR = micropython.const(1 << 16)
-
-_WRITE_BUFFER = bytearray(_WRITE_BUFFER_SIZE)
-
-MIME_TYPES = (
-    ("css", "text/css"),
-    ("png", "image/png"),
-    ("html", "text/html"),
-    ("jpg", "image/jpeg"),
-    ("jpeg", "image/jpeg"),
-    ("ico", "image/x-icon"),
-    ("svg", "image/svg+xml"),
-    ("json", "application/json"),
-    ("js", "application/javascript"),
-)
+_READ_SIZE = micropython.const(512)
+_WRITE_BUFFER_SIZE = micropython.const(1460)  # One TCP segment (MSS) per write
+_S_IFMT = micropython.const(0xF000)
+_S_IFREG = micropython.const(0x8000)
+_S_IFDIR = micropython.const(0x4000)
+_GC_LOW_MEMORY = micropython.const(16 * 1024)
+_RESPONSE_POOL_SIZE = micropython.const(4)
+
+_mem_free = getattr(gc, "mem_free", lambda: _GC_LOW_MEMORY)  # MicroPython only
+
+_WRITE_BUFFER = memoryview(bytearray(_WRITE_BUFFER_SIZE))
+
+MIME_TYPES = {
+    "css": "text/css",
+    "png": "image/png",
+    "html": "text/html",
+    "jpg": "image/jpeg",
+    "jpeg": "image/jpeg",
+    "ico": "image/x-icon",
+    "svg": "image/svg+xml",
+    "json": "application/json",
+    "js": "application/javascript",
+}
+
+_STATUS_LINES = {
+    s: b"HTTP/1.1 %s\r\n" % s for s in (b"200 OK", b"404 Not Found", b"500 Internal Server Error")
+}
+_HEADER_LINES = {
+    kv: b"%s: %s\r\n" % (kv[0].encode(), kv[1].encode())
+    for kv in (
+        ("connection", "close"),
+        ("content-type", "text/plain"),
+        ("content-encoding", "gzip"),
+        ("transfer-encoding", "chunked"),
+    )
+    + tuple(("content-type", c) for c in MIME_TYPES.values())
+}
+
+# Interned tokens, saves decoding them on every request
+_METHODS = {m.encode(): m for m in ("GET", "POST", "PUT", "DELETE", "HEAD", "OPTIONS")}
+_HEADER_NAMES = {
+    b"Host": "host",
+    b"User-Agent": "user-agent",
+    b"Accept": "accept",
+    b"Accept-Encoding": "accept-encoding",
+    b"Accept-Language": "accept-language",
+    b"Connection": "connection",
+    b"Content-Length": "content-length",
+    b"Content-Type": "content-type",
+}
+# Lower-case spellings too, as sent by HTTP/2 proxies and some clients
+_HEADER_NAMES.update({n.encode(): n for n in _HEADER_NAMES.values()})
 
 
 def get_mime(ext: str):
-    for e, c in MIME_TYPES:
-        if e == ext:
-            return c
+    return MIME_TYPES.get(ext)
 
 
 def _raise(e: BaseException):
@@ -73,7 +107,7 @@ async def _run(h, args: tuple) -> "Results":
     return await h(*args) if _is_coro(h) else h(*args)
 
 
-def _split(b: str, sep: str, max: int | None = None):
+def _split(b: "AnyStr", sep: "AnyStr", max: int | None = None) -> "Iterator[AnyStr]":
     s = i = n = 0
     sl = len(sep)
     while (n < max if max is not None else True) and (i := b.find(sep, s)) > 0:
@@ -82,44 +116,80 @@ def _split(b: str, sep: str, max: int | None = None):
     yield b[s:]
 
 
-def _gc_after(f):
-    async def w(*args):
-        try:
-            return await f(*args)
-        except:
-            raise
-        finally:
-            gc.collect()
+def _parse_request(raw: bytes) -> tuple[str, str]:
+    m, p, _ = (
+        r if len(r := tuple(_split(raw, b" "))) == 3 else _raise(ValueError("Invalid request"))
+    )
+    return _METHODS.get(m) or m.decode(), p.decode()
 
-    return w
 
+def _route_key(raw: bytes) -> bytes:
+    "Request line up to the query string or protocol, e.g. `b'GET /path'`"
+    e = raw.rfind(b" ")
+    return raw[: i if (i := raw.find(b"?", 0, e)) > 0 else e]
 
-def _parse_request(raw: str) -> tuple[str, str]:
-    m, p, _ = r if len(r := tuple(_split(raw, " "))) == 3 else _raise(ValueError("Invalid request"))
-    return m, p
 
+def _parse_header(raw: bytes) -> tuple[str, str]:
+    if (i := raw.find(b":")) < 0:
+        raise ValueError("Invalid header")
+    n = raw[:i]
+    return _HEADER_NAMES.get(n) or n.decode().lower(), raw[i + 1 :].decode().strip()
 
-def _parse_header(raw: str) -> tuple[str, str]:
-    n, v = _split(raw, ":", 1)
-    return n.lower(), v.strip()
 
+def _parse_qs(raw: str) -> "StrDict":
+    q = {}
+    for kv in _split(raw, "&"):
+        if (i := kv.find("=")) < 0:
+            q[kv] = ""
+        else:
+            q[kv[:i]] = kv[i + 1 :]
+    return q
 
-def _parse_headers(raw: str) -> "StrDict":
-    return dict(map(_parse_header, _split(raw, "\r\n")))
 
+def _split_path(raw: str) -> "tuple[str, str | None]":
+    return (raw, None) if (i := raw.find("?")) < 0 else (raw[:i], raw[i + 1 :])
 
-def _parse_qsv(qkv: str) -> tuple[str, str]:
-    k, v = _split(qkv, "=", 1)
-    return k, v
 
+def _head(s: bytes, h: "StrDict", cl: int | None = None) -> bytes:
+    if cl is not None:
+        h.pop("content-length", None)  # Written from `cl` below
 
-def _parse_qs(raw: str) -> "StrDict":
-    return dict(map(_parse_qsv, _split(raw, "&")))
+    p = [_STATUS_LINES.get(s) or b"HTTP/1.1 %s\r\n" % s]
+    pa, hl = p.append, _HEADER_LINES.get
+    for kv in h.items():
+        pa(hl(kv) or b"%s: %s\r\n" % (kv[0].encode(), kv[1].encode()))
+    if cl is not None:
+        pa(b"content-length: %d\r\n" % cl)
+    pa(b"\r\n")
+    return b"".join(p)
+
+
+def _sendfile(w):
+    "Event loop `sendfile`, when the stream exposes its transport (CPython)"
+    return getattr(w, "transport", None) and getattr(asyncio.get_event_loop(), "sendfile", None)
 
 
-def _parse_path(raw: str) -> "tuple[str, StrDict | None]":
-    p, rqs = _split(raw, "?", 1) if "?" in raw else (raw, None)
-    return p, _parse_qs(rqs) if rqs is not None else None
+def _nodelay(w):
+    "Disable Nagle's algorithm on MicroPython streams, CPython transports already do"
+    if (s := getattr(w, "s", None)) is not None:
+        try:
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        except (AttributeError, OSError):
+            pass  # Port without TCP_NODELAY
+
+
+def _open(path: str):
+    try:
+        return open(path, "rb")
+    except OSError:
+        return None
+
+
+def _is_dir(path: str) -> bool:
+    try:
+        return os.stat(path)[0] & _S_IFMT == _S_IFDIR
+    except OSError:
+        return False
 
 
 def _get_file_size(path: str) -> int | None:
@@ -127,9 +197,8 @@ def _get_file_size(path: str) -> int | None:
         s = os.stat(path)
     except OSError:
         return None
-    if s[0] & _FILE_INDICATOR:
-        return None
-    return s[6]
+    # Only regular files, checked against the file type bits of st_mode
+    return s[6] if s[0] & _S_IFMT == _S_IFREG else None
 
 
 class _Future:
@@ -171,20 +240,28 @@ class _Reader:
         self.b, self.s = b"", stream
 
     async def readuntil(self, sep: bytes):
-        b, sr = self.b, self.s.read
-        while (i := b.find(sep)) < 0 and (d := await sr(_READ_SIZE)):
-            b += d
-            gc.collect()
+        # Collect reads in a list and join once instead of growing a bytes object
+        p, w, o, sr, sl = [self.b], self.b, 0, self.s.read, len(sep)
+        while (i := w.find(sep)) < 0 and (d := await sr(_READ_SIZE)):
+            # Only rescan the tail that could hold a separator split across reads
+            t = w[max(0, len(w) - sl + 1) :]
+            o, w = o + len(w) - len(t), t + d
+            p.append(d)
 
-        r, self.b = b[:i], b[i + len(sep) :]
-        return r.decode()
+        if i < 0:
+            raise ValueError("Incomplete request")
+
+        b, i = b"".join(p), o + i
+        r, self.b = b[:i], b[i + sl :]
+        return r
 
     async def readexactly(self, n: int):
-        b, sr = self.b, self.s.read
-        while len(b) < n and (d := await sr(_READ_SIZE)):
-            b += d
-            gc.collect()
+        p, bl, sr = [self.b], len(self.b), self.s.read
+        while bl < n and (d := await sr(_READ_SIZE)):
+            p.append(d)
+            bl += len(d)
 
+        b = b"".join(p)
         r, self.b = b[:n], b[n:]
         return r.decode()
 
@@ -212,29 +289,51 @@ class Request:
         method: str,
         path: str,
         headers: "StrDict",
-        query: "StrDict | None",
+        query: "StrDict | str | None",
         body: str | None,
     ) -> None:
         self.method = method
         self.path = path
         self.headers = headers
-        self.query = query
+        self._q = query  # Raw query string until first accessed
         self.body = body
+        self._k: bytes | None = None  # Route key, set when parsed from a stream
+
+    @property
+    def query(self) -> "StrDict | None":
+        if isinstance(q := self._q, str):
+            self._q = q = _parse_qs(q)
+        return q
+
+    @query.setter
+    def query(self, query: "StrDict | None"):
+        self._q = query
 
     @classmethod
-    @_gc_after
     async def from_stream(cls, s: asyncio.StreamReader) -> "Request":
         r = _Reader(s)
-        m, rp = _parse_request(await r.readuntil(b"\r\n"))
-        p, q = _parse_path(rp)
-        h = _parse_headers(await r.readuntil(b"\r\n\r\n"))
+        m, rp = _parse_request(rl := await r.readuntil(b"\r\n"))
+        p, q = _split_path(rp)
+        h = {}
+        while hl := await r.readuntil(b"\r\n"):
+            n, v = _parse_header(hl)
+            h[n] = v
         b = await r.readexactly(int(bl)) if (bl := h.get("content-length")) else None
-        return cls(m, p, h, q, b)
+        req = cls(m, p, h, q, b)
+        req._k = _route_key(rl)
+        return req
 
 
 class Response:
     def __init__(self):
-        self.headers = {"connection": "close", "content-type": "text/plain"}
+        self.headers: "StrDict" = {}
+        self.reset()
+
+    def reset(self):
+        "Restore default fields so the instance can be reused"
+        self.headers.clear()
+        self.headers["connection"] = "close"
+        self.headers["content-type"] = "text/plain"
         self.body: "Body" = None
         self.status = b"200 OK"
 
@@ -259,16 +358,25 @@ class WebServer(Generic[_TStatic]):
         port: int = 80,
         static_folder: "_TStatic" = "static",
         request_timeout: float = 5,
+        gc_interval: int = 32,
+        static_cache_size: int = 0,
     ) -> None:
         self.static = static_folder
+        self._sp = f"./{static_folder}"  # Static path prefix
+        self._sc: "dict[tuple[str, bool], File | None]" = {}  # Static lookup cache
+        self._scs = static_cache_size
+        self._sm: "dict[str, int] | None" = None  # Static manifest, see `scan_static`
         self.timeout = request_timeout
+        self._gci = gc_interval
+        self._gcn = 0
         self._h = host
         self._p = port
-        self._r: "dict[tuple[str, str], Handler]" = {}
+        self._r: "dict[bytes, Handler]" = {}
         self._cah: "Handler" = self._dch  # Catch-all handler
         self._eh: "ErrorHandler" = self._deh  # Error handler
         self._s: asyncio.Server | None = None
         self._re = _Future()
+        self._rp: "list[Response]" = []  # Pool of reusable responses
 
     def route(self, path: str, methods: "Methods" = ("GET",)):
         def w(handler: "Handler"):
@@ -279,7 +387,7 @@ class WebServer(Generic[_TStatic]):
 
     def add_route(self, path: str, handler: "Handler", methods: "Methods" = ("GET",)):
         for method in methods:
-            self._r[(method.upper(), path)] = handler
+            self._r[b"%s %s" % (method.upper().encode(), path.encode())] = handler
 
     @staticmethod
     def _dch(req: Request, resp: Response):
@@ -303,102 +411,142 @@ class WebServer(Generic[_TStatic]):
         self._eh = h
         return h
 
-    @staticmethod
-    async def _write_status(w, s: bytes):
-        w.write(b"HTTP/1.1 %s\r\n" % s)
-        await w.drain()
-
-    @staticmethod
-    async def _write_headers(w, h: "StrDict"):
-        for v in map(lambda v: tuple(map(str.encode, v)), h.items()):
-            w.write(b"%s: %s\r\n" % v)
-        w.write(b"\r\n")
-        await w.drain()
-
     async def _respond(self, w, s: bytes, h: "StrDict", b: bytes | None):
-        await self._write_status(w, s)
-
         if b is None:
-            await self._write_headers(w, h)
-            return
-
-        h["content-length"] = str(len(b))
-        await self._write_headers(w, h)
-        w.write(b)
+            w.write(_head(s, h))
+        elif (bl := len(b)) <= _WRITE_BUFFER_SIZE:
+            w.write(_head(s, h, bl) + b)
+        else:
+            # Copying a large body into the head gains nothing, queue both
+            w.write(_head(s, h, bl))
+            w.write(b)
         await w.drain()
 
-    async def _respond_file(self, w, s: bytes, h: "StrDict", fi: File):
-        h["content-length"] = str(fi.size)
-
+    async def _respond_file(self, w, s: bytes, h: "StrDict", fi: File, f=None):
         if fi.encoding is not None:
             h["content-encoding"] = fi.encoding
 
-        if ct := get_mime((fi.path.rsplit(".", 2))[-2 if fi.encoding else -1]):
+        # Extension before the encoding suffix, e.g. "css" from "style.css.gz"
+        p = fi.path
+        e = p.rfind(".") if fi.encoding else len(p)
+        if ct := get_mime(p[p.rfind(".", 0, e) + 1 : e]):
             h["content-type"] = ct
 
-        await self._write_status(w, s)
-        await self._write_headers(w, h)
+        n = fi.size  # Never send more than announced, the file may have grown
+        b, wb, ww, wd = bytearray(_head(s, h, n)), _WRITE_BUFFER, w.write, w.drain
+        with f or open(fi.path, "rb") as f:
+            if sf := _sendfile(w):
+                ww(b)
+                await sf(w.transport, f, 0, n)
+                return
+
+            # Send the first block together with the head,
+            # files that fit the buffer go out in a single write.
+            b += wb[: (r := f.readinto(wb[: min(n, _WRITE_BUFFER_SIZE)]))]
+            ww(b)
+            await wd()
 
-        wb, ww, wd = memoryview(_WRITE_BUFFER), w.write, w.drain
-        with open(fi.path, "rb") as f:
-            while r := f.readinto(wb):
+            while (n := n - r) > 0 and (r := f.readinto(wb[: min(n, _WRITE_BUFFER_SIZE)])):
                 ww(wb[:r])
                 await wd()
 
     async def _respond_chunks(self, w, s: bytes, h: "StrDict", i: "BytesIter"):
         h["transfer-encoding"] = "chunked"
-        await self._write_status(w, s)
-        await self._write_headers(w, h)
-
-        ww, wd = w.write, w.drain
+        b, ww, wd = bytearray(_head(s, h)), w.write, w.drain
         for d in i:
-            ww(b"%x\r\n%s\r\n" % (len(d), d))
-            await wd()
-        ww(b"0\r\n\r\n")
+            b += b"%x\r\n" % len(d)
+            b += d
+            b += b"\r\n"
+            # Send small chunks together, a segment at a time
+            if len(b) >= _WRITE_BUFFER_SIZE:
+                ww(b)
+                await wd()
+                b = bytearray()
+        b += b"0\r\n\r\n"
+        ww(b)
         await wd()
 
     def _get_static(self, req: Request):
         if self.static is None:
             return
 
-        p = "./{}{}{}".format(
-            self.static, req.path, ("index.html" if req.path.endswith("/") else "")
-        )
-
-        if (
-            "gzip" in req.headers.get("accept-encoding", "")
-            and (fi := File.from_path(p + ".gz", "gzip"))
-            or (fi := File.from_path(p))
-        ):
-            return fi
+        gz = "gzip" in req.headers.get("accept-encoding", "")
+        if (k := (req.path, gz)) in self._sc:
+            return self._sc[k]
+
+        p = self._sp + req.path
+        if req.path[-1:] == "/":
+            p += "index.html"
+        fi = gz and self._static_file(p + ".gz", "gzip") or self._static_file(p)
+
+        if self._scs:
+            if len(self._sc) >= self._scs:
+                self._sc.clear()
+            self._sc[k] = fi
+
+        return fi
+
+    def _static_file(self, path: str, encoding: "Encodings | None" = None):
+        if self._sm is None:
+            return File.from_path(path, encoding)
+        if s := self._sm.get(path):
+            return File(path, s, encoding)
+
+    def _scan(self, d: str, m: "dict[str, int]"):
+        for n in os.listdir(d):
+            if s := _get_file_size(p := f"{d}/{n}"):
+                m[p] = s
+            elif _is_dir(p):
+                self._scan(p, m)
+
+    def scan_static(self):
+        "Index the static folder, later lookups skip `os.stat`. Call again after files change."
+        self._sc.clear()
+        self._sm = m = {}
+        if self.static is not None:
+            self._scan(self._sp, m)
 
     async def _handle_request(self, w, req: Request, resp: Response):
+        f = None
         try:
-            if h := self._r.get((req.method, req.path)):
+            k = req._k or b"%s %s" % (req.method.encode(), req.path.encode())
+            if h := self._r.get(k):
                 r = await _run(h, (req, resp))
-            elif req.method == "GET" and (fi := self._get_static(req)):
+            # Files can vanish after a cached or scanned lookup, treat those as not found
+            elif req.method == "GET" and (fi := self._get_static(req)) and (f := _open(fi.path)):
                 r = fi
             else:
                 r = await _run(self._cah, (req, resp))
 
+            # Open handler files here too, so a missing one goes to the error handler
+            if f is None and isinstance(b := r if r is not None else resp.body, File):
+                f = _open(b.path) or _raise(OSError("Invalid file"))
+
         except Exception as e:
             r = await _run(self._eh, (req, resp, e))
 
         if r is not None:
-            resp.set_body(r)
+            resp.body = r.encode() if isinstance(r, str) else r
 
         if isinstance(resp.body, bytes) or resp.body is None:
             await self._respond(w, resp.status, resp.headers, resp.body)
         elif isinstance(resp.body, File):
-            await self._respond_file(w, resp.status, resp.headers, resp.body)
+            await self._respond_file(w, resp.status, resp.headers, resp.body, f)
         elif _iterable(resp.body):
             await self._respond_chunks(w, resp.status, resp.headers, resp.body)
         else:
             await self._respond(w, resp.status, resp.headers, str(resp.body).encode())
 
-    @_gc_after
+    def _gc(self):
+        "Collect every `gc_interval` requests, or sooner when running low on memory"
+        self._gcn += 1
+        if self._gcn >= self._gci or _mem_free() < _GC_LOW_MEMORY:
+            self._gcn = 0
+            gc.collect()
+
     async def _handle(self, r, w):
-        resp = Response()
+        _nodelay(w)
+        resp = self._rp.pop() if self._rp else Response()
 
         try:
             req = await asyncio.wait_for(Request.from_stream(r), self.timeout)
@@ -412,7 +560,13 @@ class WebServer(Generic[_TStatic]):
             await self._handle_request(w, req, resp)
         finally:
             w.close()
-            await w.wait_closed()
+            try:
+                await w.wait_closed()
+            finally:
+                if len(self._rp) < _RESPONSE_POOL_SIZE:
+                    resp.reset()
+                    self._rp.append(resp)
+                self._gc()
 
     async def start(self):
         try: